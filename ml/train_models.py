@@ -6,174 +6,400 @@ This script trains machine learning models using collected user data.
 Requirements:
 - Python 3.8+
 - scikit-learn
-- pandas
+- pandas (2.0+)
 - numpy
 - joblib (for model serialization)
+- pyarrow (optional, enables the Parquet cache for training data)
+- lz4 (optional, faster model compression; falls back to zlib)
+- treelite + tl2cgen (optional, compiles models to native code; needs gcc)
 
-Install: pip install scikit-learn pandas numpy joblib supabase
+Install: pip install scikit-learn pandas numpy joblib supabase pyarrow lz4 treelite tl2cgen
 
 Usage:
     python train_models.py --model workout_success
     python train_models.py --model recovery_time
     python train_models.py --model weight_progression
+    python train_models.py --model all --n-jobs 2   # cap threads (e.g. on CI)
 """
 
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.preprocessing import StandardScaler
+from sklearn.ensemble import HistGradientBoostingClassifier, HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
 from sklearn.metrics import accuracy_score, classification_report, mean_squared_error, r2_score
+from threadpoolctl import threadpool_limits
 import joblib
 import json
 from datetime import datetime
 import argparse
+import glob
+import os
+import sys
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+try:
+    import lz4  # noqa: F401
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+
+try:
+    import treelite
+    import tl2cgen
+    HAS_TREELITE = True
+except ImportError:
+    HAS_TREELITE = False
+
+# Saved models are compressed; joblib.load detects the format automatically
+MODEL_COMPRESSION = ('lz4', 3) if HAS_LZ4 else ('zlib', 3)
+
+
+# Serializes console output from models trained in parallel threads
+_print_lock = threading.Lock()
+
+def print_block(*lines):
+    """Print lines as one uninterrupted block, safe to call from any thread"""
+    text = '\n'.join(lines) + '\n'
+    with _print_lock:
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+
+def limit_threads(n_jobs):
+    """
+    Cap the OpenMP threads used by a model, following the sklearn
+    n_jobs convention (-1 = all cores, -2 = all but one, ...).
+    """
+    if n_jobs == 0:
+        raise ValueError("n_jobs=0 is not valid; use a positive count or -1 for all cores")
+    return threadpool_limits(limits=joblib.effective_n_jobs(n_jobs), user_api='openmp')
+
+
+def compile_ensemble(model, libpath):
+    """
+    Compile a fitted tree ensemble into a native shared library with
+    treelite and return a predictor for it.
+    
+    Compilation is an optional speed-up: returns None (predictions stay
+    on sklearn) when treelite is missing or the build fails, e.g. because
+    no gcc toolchain is available.
+    """
+    if not HAS_TREELITE:
+        return None
+    
+    try:
+        tl_model = treelite.sklearn.import_model(model)
+        tl2cgen.export_lib(tl_model, toolchain='gcc', libpath=libpath,
+                           params={'parallel_comp': 4})
+        return tl2cgen.Predictor(libpath, verbose=False)
+    except Exception as e:
+        print_block(f"\n⚠️  Native compilation skipped: {e}")
+        # Never leave a partial library behind
+        if os.path.exists(libpath):
+            os.remove(libpath)
+        return None
+
+
+def predict_compiled(predictor, X):
+    """Run a compiled ensemble on X, returning an (n_samples, n_outputs) array"""
+    return predictor.predict(tl2cgen.DMatrix(X)).reshape(len(X), -1)
+
+
+class FeatureMatrixMixin:
+    """
+    Shared feature extraction for the predictors.
+    
+    Subclasses define feature_names and set _col_locs and
+    _col_locs_columns in __init__.
+    """
+    
+    def feature_matrix(self, df, rows=None):
+        """
+        Extract feature_names from df as a float32 matrix.
+        
+        Column positions are cached and reused while df has the same
+        columns, so repeated calls select by position (iloc) rather than
+        repeating pandas' label lookup. rows optionally selects rows
+        with a boolean mask.
+        """
+        # Identity check first: the same frame (or one sharing its column
+        # Index) skips comparing labels altogether
+        if (self._col_locs is None
+                or (df.columns is not self._col_locs_columns
+                    and not df.columns.equals(self._col_locs_columns))):
+            self._col_locs = np.array(
+                [df.columns.get_loc(name) for name in self.feature_names],
+                dtype=np.intp)
+        self._col_locs_columns = df.columns
+        
+        if rows is None:
+            selected = df.iloc[:, self._col_locs]
+        else:
+            selected = df.iloc[rows, self._col_locs]
+        return selected.to_numpy(dtype=np.float32)
+
+
+class SavedModelMixin:
+    """
+    Shared save/load for the predictors.
+    
+    The pickle names the compiled library built from the same training
+    run (`<model>.<trained_at>.so`), so a library is only ever attached to
+    the model it was compiled from. Subclasses list any extra attributes
+    to persist in saved_attributes.
+    """
+    
+    saved_attributes = ()
+    
+    def _save(self, path):
+        trained_at = datetime.now()
+        stem = os.path.splitext(path)[0]
+        compiled_lib = None
+        if HAS_TREELITE:
+            compiled_lib = f"{os.path.basename(stem)}.{trained_at:%Y%m%dT%H%M%S%f}.so"
+        
+        # Libraries from earlier runs belong to the model being replaced
+        for libpath in glob.glob(glob.escape(stem) + '.*.so') + [stem + '.so']:
+            if os.path.exists(libpath):
+                os.remove(libpath)
+        
+        joblib.dump({
+            'model': self.model,
+            'feature_names': self.feature_names,
+            **{name: getattr(self, name) for name in self.saved_attributes},
+            'compiled_lib': compiled_lib,
+            'trained_at': trained_at.isoformat()
+        }, path, compress=MODEL_COMPRESSION, protocol=5)
+        print_block(f"\n✅ Model saved to {path}")
+        
+        # Compile only after the pickle is safely on disk
+        self.compiled_model_ = None
+        if compiled_lib is not None:
+            self.compiled_model_ = compile_ensemble(
+                self.model, os.path.join(os.path.dirname(path), compiled_lib))
+    
+    @classmethod
+    def load(cls, path):
+        """
+        Restore a predictor saved with save(), attaching its compiled
+        library when treelite is available and the library was built.
+        """
+        data = joblib.load(path)
+        predictor = cls()
+        predictor.model = data['model']
+        for name in cls.saved_attributes:
+            setattr(predictor, name, data[name])
+        
+        compiled_lib = data.get('compiled_lib')
+        if HAS_TREELITE and compiled_lib is not None:
+            libpath = os.path.join(os.path.dirname(path), compiled_lib)
+            if os.path.exists(libpath):
+                predictor.compiled_model_ = tl2cgen.Predictor(libpath, verbose=False)
+        return predictor
+
 
 # ============================================
 # 1. WORKOUT SUCCESS PREDICTOR
 # ============================================
 
-class WorkoutSuccessPredictor:
+class WorkoutSuccessPredictor(FeatureMatrixMixin, SavedModelMixin):
     """
     Predicts whether a user will complete their planned workout
     based on sleep, nutrition, and fatigue data.
     
-    Model: Random Forest Classifier
+    Model: Histogram Gradient Boosting Classifier
     Target: workout_completed (binary: 0 or 1)
     """
     
-    def __init__(self):
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            min_samples_split=5,
+    feature_names = (
+        'sleep_hours',
+        'sleep_quality',
+        'calories',
+        'protein',
+        'fatigue_score',
+        'days_since_rest',
+        'planned_volume',
+        'readiness_score',
+        'injury_risk_score'
+    )
+    # Non-feature columns prepare_data() reads (targets, keys)
+    extra_columns = ('workout_completed',)
+    
+    def __init__(self, n_jobs=-1):
+        self.model = HistGradientBoostingClassifier(
+            max_iter=200,
+            max_depth=8,
+            learning_rate=0.05,
+            early_stopping=True,
             random_state=42
         )
-        self.scaler = StandardScaler()
-        self.feature_names = [
-            'sleep_hours',
-            'sleep_quality',
-            'calories',
-            'protein',
-            'fatigue_score',
-            'days_since_rest',
-            'planned_volume',
-            'readiness_score',
-            'injury_risk_score'
-        ]
+        self.n_jobs = n_jobs
+        self.compiled_model_ = None
+        self._col_locs = None
+        self._col_locs_columns = None
     
     def prepare_data(self, df):
         """Prepare features and target from dataframe"""
-        X = df[self.feature_names].fillna(df[self.feature_names].median())
-        y = df['workout_completed'].astype(int)
+        # Missing values stay NaN; the model routes them natively
+        X = self.feature_matrix(df)
+        # astype raises on missing labels instead of casting NaN to 0 (Failed)
+        y = df['workout_completed'].astype(np.int8).to_numpy()
         return X, y
     
     def train(self, df):
         """Train the model"""
         X, y = self.prepare_data(df)
         
-        # Split data
+        # Split data (boosting has no out-of-bag estimate)
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, test_size=0.2, random_state=42
         )
         
-        # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
-        # Train model
-        self.model.fit(X_train_scaled, y_train)
-        
-        # Evaluate
-        y_pred = self.model.predict(X_test_scaled)
+        # Fitting, evaluation and permutation importance all run the
+        # model's OpenMP loops, so they share one thread cap
+        with limit_threads(self.n_jobs):
+            # Train model (tree splits are scale-invariant, so no scaling step)
+            self.model.fit(X_train, y_train)
+            
+            # Evaluate
+            y_pred = self.model.predict(X_test)
+            
+            # Feature importance (gradient boosting has no impurity-based
+            # importances, so measure the accuracy drop per shuffled feature)
+            permutation = permutation_importance(
+                self.model, X_test, y_test, n_repeats=5, random_state=42
+            )
         accuracy = accuracy_score(y_test, y_pred)
         
-        print(f"\n{'='*50}")
-        print("WORKOUT SUCCESS PREDICTOR - Training Results")
-        print(f"{'='*50}")
-        print(f"Accuracy: {accuracy:.2%}")
-        print(f"Training samples: {len(X_train)}")
-        print(f"Test samples: {len(X_test)}")
-        print("\nClassification Report:")
-        print(classification_report(y_test, y_pred, 
-                                    target_names=['Failed', 'Completed']))
-        
-        # Feature importance
+        report = [
+            f"\n{'='*50}",
+            "WORKOUT SUCCESS PREDICTOR - Training Results",
+            f"{'='*50}",
+            f"Accuracy: {accuracy:.2%}",
+            f"Training samples: {len(X_train)}",
+            f"Test samples: {len(X_test)}",
+            f"Boosting iterations: {self.model.n_iter_}",
+            "\nClassification Report:",
+            classification_report(y_test, y_pred,
+                                  target_names=['Failed', 'Completed'])
+        ]
+        
         importance = pd.DataFrame({
-            'feature': self.feature_names,
-            'importance': self.model.feature_importances_
+            'feature': list(self.feature_names),
+            'importance': permutation.importances_mean
         }).sort_values('importance', ascending=False)
         
-        print("\nFeature Importance:")
-        print(importance.to_string(index=False))
+        report += ["\nFeature Importance:", importance.to_string(index=False)]
+        # One block, so reports of models trained in parallel don't interleave
+        print_block(*report)
         
         return {
             'accuracy': accuracy,
+            'n_iter': self.model.n_iter_,
             'feature_importance': importance.to_dict('records')
         }
     
+    def predict_many(self, X):
+        """
+        Predict workout completion for a batch of feature rows.
+        
+        Runs a single model call for the whole batch and returns a
+        structured array with will_complete, probability and confidence.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if self.compiled_model_ is not None:
+            # Binary models compile to a single positive-class column
+            probability = predict_compiled(self.compiled_model_, X)[:, -1]
+        else:
+            probability = self.model.predict_proba(X)[:, 1]
+        
+        results = np.empty(len(probability), dtype=[
+            ('will_complete', bool),
+            ('probability', np.float64),
+            ('confidence', np.float64)
+        ])
+        results['will_complete'] = probability > 0.5
+        results['probability'] = probability
+        results['confidence'] = np.abs(probability - 0.5) * 2  # 0 to 1
+        return results
+    
     def predict(self, features):
         """Predict workout completion probability"""
-        features_scaled = self.scaler.transform([features])
-        probability = self.model.predict_proba(features_scaled)[0][1]
+        result = self.predict_many([features])[0]
         return {
-            'will_complete': probability > 0.5,
-            'probability': float(probability),
-            'confidence': abs(probability - 0.5) * 2  # 0 to 1
+            'will_complete': bool(result['will_complete']),
+            'probability': float(result['probability']),
+            'confidence': float(result['confidence'])
         }
     
     def save(self, path='models/workout_success_model.pkl'):
-        """Save model to disk"""
-        joblib.dump({
-            'model': self.model,
-            'scaler': self.scaler,
-            'feature_names': self.feature_names,
-            'trained_at': datetime.now().isoformat()
-        }, path)
-        print(f"\n✅ Model saved to {path}")
+        """Save model to disk (plus a compiled .so when treelite is available)"""
+        self._save(path)
 
 
 # ============================================
 # 2. RECOVERY TIME PREDICTOR
 # ============================================
 
-class RecoveryTimePredictor:
+class RecoveryTimePredictor(FeatureMatrixMixin, SavedModelMixin):
     """
     Predicts personalized recovery time for each muscle group
     based on workout intensity, sleep, and nutrition.
     
-    Model: Random Forest Regressor
+    Model: Histogram Gradient Boosting Regressor
     Target: actual_recovery_days (continuous)
     """
     
-    def __init__(self):
-        self.model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=10,
+    feature_names = (
+        'workout_volume',
+        'workout_intensity',
+        'sleep_quality',
+        'nutrition_quality'
+    )
+    # Non-feature columns prepare_data() reads (targets, keys)
+    extra_columns = ('muscle_group', 'actual_recovery_days')
+    saved_attributes = ('muscle_groups',)
+    
+    def __init__(self, n_jobs=-1):
+        self.model = HistGradientBoostingRegressor(
+            max_iter=200,
+            max_depth=8,
+            learning_rate=0.05,
+            early_stopping=True,
             random_state=42
         )
-        self.scaler = StandardScaler()
-        self.feature_names = [
-            'workout_volume',
-            'workout_intensity',
-            'sleep_quality',
-            'nutrition_quality'
-        ]
+        self.n_jobs = n_jobs
+        self.compiled_model_ = None
+        self._col_locs = None
+        self._col_locs_columns = None
         # One-hot encode muscle groups
         self.muscle_groups = ['chest', 'back', 'shoulders', 'legs', 'arms', 'core']
     
     def prepare_data(self, df):
         """Prepare features with one-hot encoding"""
-        # One-hot encode muscle groups
-        muscle_dummies = pd.get_dummies(df['muscle_group'], prefix='muscle')
+        n_features = len(self.feature_names)
+        
+        # Single float32 buffer: numeric features, then the muscle one-hot
+        X = np.empty((len(df), n_features + len(self.muscle_groups)), dtype=np.float32)
+        X[:, :n_features] = self.feature_matrix(df)
         
-        # Combine features
-        X = pd.concat([
-            df[self.feature_names].fillna(df[self.feature_names].median()),
-            muscle_dummies
-        ], axis=1)
+        # One-hot encode muscle groups against the fixed category list so
+        # the column layout never depends on which groups appear in df
+        cat2idx = {g: i for i, g in enumerate(self.muscle_groups)}
+        idx = df['muscle_group'].map(cat2idx).to_numpy(dtype=np.float64)
+        known = ~np.isnan(idx)  # unseen groups keep an all-zero row
+        X[:, n_features:] = 0
+        X[np.flatnonzero(known), n_features + idx[known].astype(np.intp)] = 1
         
-        y = df['actual_recovery_days']
+        y = df['actual_recovery_days'].to_numpy(dtype=np.float32)
         
         return X, y
     
@@ -186,85 +412,112 @@ class RecoveryTimePredictor:
             X, y, test_size=0.2, random_state=42
         )
         
-        # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
-        # Train
-        self.model.fit(X_train_scaled, y_train)
+        # Train, then evaluate under the same thread cap
+        with limit_threads(self.n_jobs):
+            self.model.fit(X_train, y_train)
+            y_pred = self.model.predict(X_test)
         
         # Evaluate
-        y_pred = self.model.predict(X_test_scaled)
         mse = mean_squared_error(y_test, y_pred)
         r2 = r2_score(y_test, y_pred)
         
-        print(f"\n{'='*50}")
-        print("RECOVERY TIME PREDICTOR - Training Results")
-        print(f"{'='*50}")
-        print(f"R² Score: {r2:.3f}")
-        print(f"RMSE: {np.sqrt(mse):.2f} days")
-        print(f"Training samples: {len(X_train)}")
+        print_block(
+            f"\n{'='*50}",
+            "RECOVERY TIME PREDICTOR - Training Results",
+            f"{'='*50}",
+            f"R² Score: {r2:.3f}",
+            f"RMSE: {np.sqrt(mse):.2f} days",
+            f"Training samples: {len(X_train)}",
+            f"Boosting iterations: {self.model.n_iter_}"
+        )
         
         return {
             'r2_score': r2,
-            'rmse': np.sqrt(mse)
+            'rmse': np.sqrt(mse),
+            'n_iter': self.model.n_iter_
         }
     
+    def predict_many(self, X):
+        """
+        Predict recovery time for a batch of rows (features + muscle one-hot).
+        
+        Returns a structured array with recovery_days and recovery_hours.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if self.compiled_model_ is not None:
+            days = predict_compiled(self.compiled_model_, X)[:, 0]
+        else:
+            days = self.model.predict(X)
+        
+        results = np.empty(len(days), dtype=[
+            ('recovery_days', np.float64),
+            ('recovery_hours', np.float64)
+        ])
+        results['recovery_days'] = days
+        results['recovery_hours'] = days * 24
+        return results
+    
     def predict(self, features):
         """Predict recovery time"""
-        features_scaled = self.scaler.transform([features])
-        days = self.model.predict(features_scaled)[0]
+        result = self.predict_many([features])[0]
         return {
-            'recovery_days': float(days),
-            'recovery_hours': float(days * 24)
+            'recovery_days': float(result['recovery_days']),
+            'recovery_hours': float(result['recovery_hours'])
         }
     
     def save(self, path='models/recovery_time_model.pkl'):
         """Save model"""
-        joblib.dump({
-            'model': self.model,
-            'scaler': self.scaler,
-            'feature_names': self.feature_names,
-            'muscle_groups': self.muscle_groups,
-            'trained_at': datetime.now().isoformat()
-        }, path)
-        print(f"\n✅ Model saved to {path}")
+        self._save(path)
 
 
 # ============================================
 # 3. WEIGHT PROGRESSION PREDICTOR
 # ============================================
 
-class WeightProgressionPredictor:
+class WeightProgressionPredictor(FeatureMatrixMixin, SavedModelMixin):
     """
     Predicts optimal weight increase for each exercise
     based on user's history and current performance.
     
-    Model: Random Forest Regressor
+    Model: Histogram Gradient Boosting Regressor
     Target: optimal_weight_increase (continuous)
     """
     
-    def __init__(self):
-        self.model = RandomForestRegressor(
-            n_estimators=100,
+    feature_names = (
+        'previous_weight',
+        'reps_achieved',
+        'target_reps',
+        'form_quality'
+    )
+    # Non-feature columns prepare_data() reads (targets, keys)
+    extra_columns = ('successful', 'weight_increase')
+    
+    def __init__(self, n_jobs=-1):
+        self.model = HistGradientBoostingRegressor(
+            max_iter=200,
             max_depth=8,
+            learning_rate=0.05,
+            early_stopping=True,
             random_state=42
         )
-        self.scaler = StandardScaler()
-        self.feature_names = [
-            'previous_weight',
-            'reps_achieved',
-            'target_reps',
-            'form_quality'
-        ]
+        self.n_jobs = n_jobs
+        self.compiled_model_ = None
+        self._col_locs = None
+        self._col_locs_columns = None
+    
+    def success_mask(self, df):
+        """Boolean mask of the rows whose progression was successful"""
+        # eq/fillna also covers Arrow-backed and object columns with nulls
+        return df['successful'].eq(True).fillna(False).to_numpy(dtype=bool)
     
     def prepare_data(self, df):
         """Prepare features"""
-        # Only use successful progressions for training
-        df_success = df[df['successful'] == True].copy()
+        # Only use successful progressions for training, selecting just
+        # the columns we need instead of copying every column of df
+        success = self.success_mask(df)
         
-        X = df_success[self.feature_names].fillna(df_success[self.feature_names].median())
-        y = df_success['weight_increase']
+        X = self.feature_matrix(df, success)
+        y = df['weight_increase'].to_numpy(dtype=np.float32)[success]
         
         return X, y
     
@@ -277,86 +530,170 @@ class WeightProgressionPredictor:
             X, y, test_size=0.2, random_state=42
         )
         
-        # Scale
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
-        # Train
-        self.model.fit(X_train_scaled, y_train)
+        # Train, then evaluate under the same thread cap
+        with limit_threads(self.n_jobs):
+            self.model.fit(X_train, y_train)
+            y_pred = self.model.predict(X_test)
         
         # Evaluate
-        y_pred = self.model.predict(X_test_scaled)
         mse = mean_squared_error(y_test, y_pred)
         r2 = r2_score(y_test, y_pred)
         
-        print(f"\n{'='*50}")
-        print("WEIGHT PROGRESSION PREDICTOR - Training Results")
-        print(f"{'='*50}")
-        print(f"R² Score: {r2:.3f}")
-        print(f"RMSE: {np.sqrt(mse):.2f} kg")
-        print(f"Training samples: {len(X_train)}")
+        print_block(
+            f"\n{'='*50}",
+            "WEIGHT PROGRESSION PREDICTOR - Training Results",
+            f"{'='*50}",
+            f"R² Score: {r2:.3f}",
+            f"RMSE: {np.sqrt(mse):.2f} kg",
+            f"Training samples: {len(X_train)}",
+            f"Boosting iterations: {self.model.n_iter_}"
+        )
         
         return {
             'r2_score': r2,
-            'rmse': np.sqrt(mse)
+            'rmse': np.sqrt(mse),
+            'n_iter': self.model.n_iter_
         }
     
+    def predict_many(self, X):
+        """
+        Predict optimal weight increase for a batch of feature rows.
+        
+        Returns a structured array with recommended_increase and new_weight.
+        Missing features are handled by the model, but new_weight is NaN
+        for rows without a previous_weight since there is nothing to add
+        the increase to.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if self.compiled_model_ is not None:
+            increase = predict_compiled(self.compiled_model_, X)[:, 0]
+        else:
+            increase = self.model.predict(X)
+        
+        results = np.empty(len(increase), dtype=[
+            ('recommended_increase', np.float64),
+            ('new_weight', np.float64)
+        ])
+        results['recommended_increase'] = increase
+        results['new_weight'] = X[:, 0] + increase
+        return results
+    
     def predict(self, features):
-        """Predict optimal weight increase"""
-        features_scaled = self.scaler.transform([features])
-        increase = self.model.predict(features_scaled)[0]
+        """
+        Predict optimal weight increase.
+        
+        new_weight is None when previous_weight is missing.
+        """
+        result = self.predict_many([features])[0]
+        new_weight = float(result['new_weight'])
         return {
-            'recommended_increase': float(increase),
-            'new_weight': float(features[0] + increase)
+            'recommended_increase': float(result['recommended_increase']),
+            'new_weight': None if np.isnan(new_weight) else new_weight
         }
     
     def save(self, path='models/weight_progression_model.pkl'):
         """Save model"""
-        joblib.dump({
-            'model': self.model,
-            'scaler': self.scaler,
-            'feature_names': self.feature_names,
-            'trained_at': datetime.now().isoformat()
-        }, path)
-        print(f"\n✅ Model saved to {path}")
+        self._save(path)
 
 
 # ============================================
 # MAIN TRAINING SCRIPT
 # ============================================
 
-def load_data_from_csv(filepath):
-    """Load training data from CSV"""
-    return pd.read_csv(filepath)
+# Parquet metadata key recording which CSV a cache was built from
+CACHE_SOURCE_KEY = b'fittrack.source_csv'
 
-def train_workout_success_model(data_path):
-    """Train workout success predictor"""
-    print("\n🤖 Training Workout Success Predictor...")
-    df = load_data_from_csv(data_path)
+def csv_signature(filepath):
+    """Size and mtime of a CSV, identifying the version a cache was built from"""
+    stat = os.stat(filepath)
+    return json.dumps({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}).encode()
+
+def cache_signature(cache_path):
+    """The csv_signature stored in a Parquet cache, or None if unusable"""
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except (OSError, pa.ArrowException):
+        return None
+    return metadata.get(CACHE_SOURCE_KEY)
+
+def load_data_from_csv(filepath, feature_names=None, extra_columns=()):
+    """
+    Load training data from CSV.
     
-    predictor = WorkoutSuccessPredictor()
+    When pyarrow is installed the CSV is parsed by the pyarrow engine
+    into Arrow-backed columns and cached next to the CSV as
+    `<filepath>.parquet`, which is reused while the CSV's size and mtime
+    match the ones recorded in the cache.
+    If feature_names is given, only those columns plus extra_columns
+    (targets, categorical keys) are returned; without pyarrow the
+    features are parsed as float32 directly.
+    """
+    columns = None
+    dtype = None
+    if feature_names is not None:
+        columns = list(feature_names) + list(extra_columns)
+        dtype = {name: np.float32 for name in feature_names}
+    
+    if not HAS_PYARROW:
+        return pd.read_csv(filepath, usecols=columns, dtype=dtype)
+    
+    cache_path = filepath + '.parquet'
+    source = csv_signature(filepath)
+    if cache_signature(cache_path) == source:
+        return pd.read_parquet(cache_path, engine='pyarrow', columns=columns,
+                               dtype_backend='pyarrow')
+    
+    # Cache the whole file so every model can reuse it. Write to a temp
+    # file first so concurrent loaders never read a half-written cache.
+    df = pd.read_csv(filepath, engine='pyarrow', dtype_backend='pyarrow')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata(
+        {**table.schema.metadata, CACHE_SOURCE_KEY: source})
+    tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        pq.write_table(table, tmp_path, compression='snappy')
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        # The cache is only a speed-up, e.g. the CSV may sit in a
+        # read-only directory
+        print(f"\n⚠️  Parquet cache not written: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return df if columns is None else df[columns]
+
+def training_columns(predictor_classes):
+    """
+    Feature and extra columns needed to train the given predictors, in
+    the (feature_names, extra_columns) form load_data_from_csv expects.
+    """
+    feature_names, extra_columns = {}, {}
+    for predictor_class in predictor_classes:
+        feature_names.update(dict.fromkeys(predictor_class.feature_names))
+        extra_columns.update(dict.fromkeys(predictor_class.extra_columns))
+    return list(feature_names), [c for c in extra_columns if c not in feature_names]
+
+def train_workout_success_model(df, n_jobs=-1):
+    """Train workout success predictor"""
+    print_block("\n🤖 Training Workout Success Predictor...")
+    predictor = WorkoutSuccessPredictor(n_jobs=n_jobs)
     metrics = predictor.train(df)
     predictor.save()
     
     return predictor, metrics
 
-def train_recovery_model(data_path):
+def train_recovery_model(df, n_jobs=-1):
     """Train recovery time predictor"""
-    print("\n🤖 Training Recovery Time Predictor...")
-    df = load_data_from_csv(data_path)
-    
-    predictor = RecoveryTimePredictor()
+    print_block("\n🤖 Training Recovery Time Predictor...")
+    predictor = RecoveryTimePredictor(n_jobs=n_jobs)
     metrics = predictor.train(df)
     predictor.save()
     
     return predictor, metrics
 
-def train_progression_model(data_path):
+def train_progression_model(df, n_jobs=-1):
     """Train weight progression predictor"""
-    print("\n🤖 Training Weight Progression Predictor...")
-    df = load_data_from_csv(data_path)
-    
-    predictor = WeightProgressionPredictor()
+    print_block("\n🤖 Training Weight Progression Predictor...")
+    predictor = WeightProgressionPredictor(n_jobs=n_jobs)
     metrics = predictor.train(df)
     predictor.save()
     
@@ -370,21 +707,50 @@ if __name__ == "__main__":
                        help='Which model to train')
     parser.add_argument('--data', type=str, required=True,
                        help='Path to training data CSV file')
+    parser.add_argument('--n-jobs', type=int, default=None,
+                       help='Threads used per model (-1 = all cores; default: all '
+                            'cores, split evenly between models with --model all)')
     
     args = parser.parse_args()
+    if args.n_jobs == 0:
+        parser.error("--n-jobs must be a positive count or negative (-1 = all cores)")
     
     print(f"\n{'='*60}")
     print("FitTrack ML Model Training Pipeline")
     print(f"{'='*60}")
     
-    if args.model == 'workout_success' or args.model == 'all':
-        train_workout_success_model(args.data)
+    trainers = {
+        'workout_success': train_workout_success_model,
+        'recovery_time': train_recovery_model,
+        'weight_progression': train_progression_model
+    }
+    predictor_classes = {
+        'workout_success': WorkoutSuccessPredictor,
+        'recovery_time': RecoveryTimePredictor,
+        'weight_progression': WeightProgressionPredictor
+    }
+    selected = list(trainers) if args.model == 'all' else [args.model]
     
-    if args.model == 'recovery_time' or args.model == 'all':
-        train_recovery_model(args.data)
+    # Parse the data once, reading only the columns the selected models
+    # use, and share it between them
+    feature_names, extra_columns = training_columns(
+        predictor_classes[name] for name in selected)
+    df = load_data_from_csv(args.data, feature_names, extra_columns)
     
-    if args.model == 'weight_progression' or args.model == 'all':
-        train_progression_model(args.data)
+    if args.model == 'all':
+        # The models are independent, so train them in threads. Each one
+        # starts its own OpenMP pool; unless --n-jobs says otherwise, split
+        # the cores between them instead of oversubscribing.
+        n_jobs = args.n_jobs
+        if n_jobs is None:
+            n_jobs = max(1, joblib.cpu_count() // len(trainers))
+        joblib.Parallel(n_jobs=len(trainers), backend='threading')(
+            joblib.delayed(train)(df, n_jobs=n_jobs)
+            for train in trainers.values()
+        )
+    else:
+        n_jobs = -1 if args.n_jobs is None else args.n_jobs
+        trainers[args.model](df, n_jobs=n_jobs)
     
     print(f"\n{'='*60}")
     print("✅ Training Complete!")